@@ -0,0 +1,298 @@
+"""Command-line entry point for Ankeep.
+
+Only the standard library is imported at module load. Each subcommand imports
+the modules it needs (anki, bs4, openai, tqdm, ...) when it runs, so that
+``ankeep --help`` and the deck commands start quickly. Run
+``python benchmarks/import_time.py`` after touching imports here or in the
+modules below to check that startup has not regressed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+from collections import defaultdict
+from typing import Sequence
+
+logger = logging.getLogger("ankeep")
+
+# Loggers whose level is set by -q/-v.
+LOGGERS = ["ankeep", "main", "anki_manager"]
+
+# Destinations of the options defined by common_options().
+COMMON_OPTIONS = ["profile", "decknames", "quiet", "verbose"]
+
+# Values of main.Model, listed here so that building the parser does not
+# import the tagging module.
+MODELS = [
+    "gpt-4",
+    "gpt-4-1106-preview",
+    "gpt-4-vision-preview",
+    "gpt-3.5-turbo-1106",
+    "gpt-3.5-turbo",
+]
+
+
+def open_manager(args: argparse.Namespace, fetch_cards: bool = False):
+    from anki_manager import AnkiManager
+
+    return AnkiManager(args.profile, fetch_cards=fetch_cards, decknames=args.decknames)
+
+
+def iter_cards(manager):
+    for cards in manager.cards.values():
+        yield from cards
+
+
+def cmd_tag(args: argparse.Namespace) -> None:
+    import main as tagger
+
+    if not os.getenv("OPENAI_API_KEY"):
+        logger.error("OPENAI_API_KEY is not set; it is required for tagging.")
+        sys.exit(1)
+
+    if args.model is not None:
+        tagger.bot.model = tagger.Model(args.model)
+
+    tagger.main(args.profile, args.decknames)
+
+
+def lint_card(card, max_answer_words: int) -> list[str]:
+    """Return the problems found with ``card``."""
+    problems = []
+    if not card.question:
+        problems.append("empty question")
+    n_words = len(card.answer.split())
+    if n_words > max_answer_words:
+        problems.append(f"answer has {n_words} words")
+    return problems
+
+
+def cmd_lint(args: argparse.Namespace) -> None:
+    n_problems = 0
+    with open_manager(args, fetch_cards=True) as manager:
+        for card in iter_cards(manager):
+            problems = lint_card(card, args.max_answer_words)
+            for problem in problems:
+                print(f"{card.deck}\t{card.question[:60]!r}\t{problem}")
+            n_problems += len(problems)
+    logger.info(f"Found {n_problems} problems.")
+
+
+def question_key(question: str) -> str:
+    """Normalize a question so that case and whitespace don't matter."""
+    return " ".join(question.lower().split())
+
+
+def find_duplicates(cards) -> list[list]:
+    """Group cards with the same question, ignoring unique questions."""
+    by_question = defaultdict(list)
+    for card in cards:
+        key = question_key(card.question)
+        if key:
+            by_question[key].append(card)
+    return [cards for cards in by_question.values() if len(cards) > 1]
+
+
+def cmd_dedupe(args: argparse.Namespace) -> None:
+    with open_manager(args, fetch_cards=True) as manager:
+        duplicates = find_duplicates(iter_cards(manager))
+        for cards in duplicates:
+            print(cards[0].question)
+            for card in cards:
+                print(f"  {card.deck} (cid {card.src_card.id})")
+    logger.info(f"Found {len(duplicates)} duplicated questions.")
+
+
+def cmd_decks(args: argparse.Namespace) -> None:
+    from anki_manager import update_retention_decks
+
+    with open_manager(args) as manager:
+        update_retention_decks(manager, reset=args.reset)
+
+
+def cmd_export(args: argparse.Namespace) -> None:
+    with open_manager(args, fetch_cards=True) as manager:
+        cards = list(iter_cards(manager))
+        manager.write_cards(cards, args.output)
+    logger.info(f"Exported {len(cards)} cards to {args.output}.")
+
+
+def cmd_stats(args: argparse.Namespace) -> None:
+    with open_manager(args) as manager:
+        total = 0
+        for dname, did in manager.get_decks():
+            n_cards = len(manager.deck_manager.cids(did))
+            total += n_cards
+            print(f"{n_cards:>8}  {dname}")
+        print(f"{total:>8}  cards in {len(manager.get_decks())} decks")
+
+
+def common_options(prefix: str = "") -> argparse.ArgumentParser:
+    """Options accepted both before and after the subcommand.
+
+    The copy added to the subcommands stores into ``prefix``-ed destinations
+    so that it does not overwrite values given before the subcommand; the two
+    are combined by :func:`merge_common_options`.
+    """
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "-p",
+        "--profile",
+        dest=f"{prefix}profile",
+        metavar="PROFILE",
+        help="Path to your Anki profile directory. Defaults to $PROFILE_DIR.",
+    )
+    common.add_argument(
+        "-d",
+        "--decknames",
+        dest=f"{prefix}decknames",
+        action="append",
+        metavar="DECK",
+        help="Only operate on this deck (and its subdecks). May be repeated.",
+    )
+    verbosity = common.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "-q",
+        "--quiet",
+        dest=f"{prefix}quiet",
+        action="store_true",
+        help="Reduce the amount of output.",
+    )
+    verbosity.add_argument(
+        "-v",
+        "--verbose",
+        dest=f"{prefix}verbose",
+        action="store_true",
+        help="Increase the amount of output.",
+    )
+    return common
+
+
+def merge_common_options(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> argparse.Namespace:
+    """Combine the common options given before and after the subcommand."""
+    sub = {name: getattr(args, f"sub_{name}") for name in COMMON_OPTIONS}
+    for name in COMMON_OPTIONS:
+        delattr(args, f"sub_{name}")
+
+    if args.profile is not None and sub["profile"] is not None:
+        parser.error("argument -p/--profile: given both before and after the command")
+    if sub["profile"] is not None:
+        args.profile = sub["profile"]
+
+    if sub["decknames"] is not None:
+        args.decknames = (args.decknames or []) + sub["decknames"]
+
+    args.quiet = args.quiet or sub["quiet"]
+    args.verbose = args.verbose or sub["verbose"]
+    if args.quiet and args.verbose:
+        parser.error("argument -q/--quiet: not allowed with argument -v/--verbose")
+
+    return args
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="ankeep",
+        description="Keep your Anki collection neat and tidy.",
+        parents=[common_options()],
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    subparsers.required = True
+    common = common_options(prefix="sub_")
+
+    tag = subparsers.add_parser(
+        "tag", parents=[common], help="Tag cards by topic using ChatGPT."
+    )
+    tag.add_argument("-m", "--model", choices=MODELS, help="The ChatGPT model to use.")
+    tag.set_defaults(func=cmd_tag)
+
+    lint = subparsers.add_parser(
+        "lint", parents=[common], help="Report cards that are hard to learn."
+    )
+    lint.add_argument(
+        "--max-answer-words",
+        type=int,
+        default=40,
+        help="Flag answers longer than this many words (default: %(default)s).",
+    )
+    lint.set_defaults(func=cmd_lint)
+
+    dedupe = subparsers.add_parser(
+        "dedupe", parents=[common], help="Report duplicated questions."
+    )
+    dedupe.set_defaults(func=cmd_dedupe)
+
+    decks = subparsers.add_parser(
+        "decks",
+        parents=[common],
+        help="Add high retention subdecks to leaf decks.",
+    )
+    decks.add_argument(
+        "--reset",
+        action="store_true",
+        help="Remove the subdecks and deck configs instead of creating them.",
+    )
+    decks.set_defaults(func=cmd_decks)
+
+    export = subparsers.add_parser(
+        "export", parents=[common], help="Export cards to a CSV file."
+    )
+    export.add_argument(
+        "-o",
+        "--output",
+        default="questions.csv",
+        help="Path of the CSV file to write (default: %(default)s).",
+    )
+    export.set_defaults(func=cmd_export)
+
+    stats = subparsers.add_parser(
+        "stats", parents=[common], help="Show the number of cards per deck."
+    )
+    stats.set_defaults(func=cmd_stats)
+
+    return parser
+
+
+def parse_args(
+    argv: Sequence[str] | None = None,
+) -> tuple[argparse.ArgumentParser, argparse.Namespace]:
+    parser = build_parser()
+    args = merge_common_options(parser, parser.parse_args(argv))
+    return parser, args
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser, args = parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    if args.quiet:
+        level = logging.WARNING
+    elif args.verbose:
+        level = logging.DEBUG
+    else:
+        level = logging.INFO
+    # Third-party libraries (httpx, anki) stay at WARNING unless -v is given.
+    logging.basicConfig(
+        format="%(asctime)s: %(message)s",
+        datefmt="%H:%M:%S",
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+    )
+    for name in LOGGERS:
+        logging.getLogger(name).setLevel(level)
+
+    if args.profile is None and os.getenv("PROFILE_DIR") is None:
+        parser.error("no profile directory given; pass --profile or set PROFILE_DIR")
+
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,30 @@
+from __future__ import annotations
+
 import csv
 import re
 import copy
-from dotenv import load_dotenv
-from typing import Any, Sequence
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, Sequence
 from pathlib import Path
 import os
-from anki.collection import Collection
-from anki.exporting import *
-from anki.decks import (
-    DeckManager,
-    DeckConfigDict,
-    DeckNameId,
-    DeckConfigId,
-)
 
 import sys
 
 import logging
-from bs4 import BeautifulSoup
+
+if TYPE_CHECKING:
+    # The anki package pulls in its Rust backend and protobuf bindings, so it
+    # is only imported once a collection is actually opened.
+    from anki.collection import Collection
+    from anki.decks import DeckManager, DeckConfigDict, DeckNameId
 
 logger = logging.getLogger(__name__)
 REMOVE_LINT_TAG = False
 
 
 def get_collection(collection_path: Path) -> Collection | None:
+    from anki.collection import Collection
+
     try:
         return Collection(str(collection_path))
     except FileNotFoundError:
@@ -34,6 +35,8 @@ def get_collection(collection_path: Path) -> Collection | None:
 
 
 def get_deck_manager(col: Collection) -> DeckManager:
+    from anki.decks import DeckManager
+
     return DeckManager(col)
 
 
@@ -50,13 +53,25 @@ def exclude_non_ascii(s: str) -> str:
 
 
 def clean_html(html: str) -> str:
+    from bs4 import BeautifulSoup
+
     return BeautifulSoup(html, "lxml").text.strip()
 
 
 class Card(object):
     def __init__(self, card: Any, deckName: str, did: str) -> None:
         self.src_card = card
-        question_html = card.question()
+        self.deck = deckName
+        self.did = did
+
+    # Rendering a card runs its template through the backend and then parses
+    # the HTML, so it is deferred until the question or answer is needed.
+    # These properties are not meant to be first accessed from several threads:
+    # on Python < 3.12 cached_property holds one lock per attribute for all
+    # instances. Call render() before handing cards to worker threads.
+    @cached_property
+    def question(self) -> str:
+        question_html = self.src_card.question()
         lines = question_html.splitlines()
         # Remove tags
         for i, line in enumerate(lines):
@@ -69,14 +84,28 @@ class Card(object):
         question_html = "\n".join([line for line in lines if line != ""])
         question_html = re.sub(r"(?m)^.*\"decktext\".*$", "", question_html)
         question_html = re.sub(r"(?m)^.*\[\[type:.*\]\].*$", "", question_html)
-        answer_html = card.answer()
-        self.question = clean_html(question_html)
-        self.answer = clean_html(answer_html)
-        self.note = self.src_card.note()
-        self.tags = self.note.tags
-        self.fields = self.note.fields
-        self.deck = deckName
-        self.did = did
+        return clean_html(question_html)
+
+    @cached_property
+    def answer(self) -> str:
+        return clean_html(self.src_card.answer())
+
+    @cached_property
+    def note(self) -> Any:
+        return self.src_card.note()
+
+    @cached_property
+    def tags(self) -> list[str]:
+        return self.note.tags
+
+    @cached_property
+    def fields(self) -> list[str]:
+        return self.note.fields
+
+    def render(self) -> None:
+        """Render the question, answer and tags now rather than on first use."""
+        for name in ("question", "answer", "tags"):
+            getattr(self, name)
 
     def remove_lint_tag(self) -> None:
         self.tags = [tag for tag in self.tags if tag != "LINT_TAGS=1"]
@@ -102,6 +131,7 @@ class AnkiManager(object):
         profile_dir: str | None = None,
         collection_filename: str = "collection.anki2",
         fetch_cards: bool = True,
+        decknames: Sequence[str] | None = None,
     ):
         if profile_dir is None:
             profile_dir = os.getenv("PROFILE_DIR")
@@ -116,11 +146,13 @@ class AnkiManager(object):
             sys.exit(1)
 
         self.deck_manager = get_deck_manager(self.collection)
-        self.decks: tuple[str, str] = []
+        self.decks: list[tuple[str, int]] = []
 
         for dinfo in get_deck_names_and_ids(self.collection):
-            # if "SRE" not in dinfo.name or "Vocab" in dinfo.name:
-            if False:
+            if decknames and not any(
+                dinfo.name == name or dinfo.name.startswith(f"{name}::")
+                for name in decknames
+            ):
                 logger.debug(f"Skipping deck {dinfo.name}")
             else:
                 self.decks.append((dinfo.name, dinfo.id))
@@ -199,85 +231,88 @@ class AnkiManager(object):
             seen.update(cids)
         return cards
 
-    def write_cards(self, cards: list[Card]):
-        logger.debug("Writing cards to questions.csv")
-        with open("questions.csv", "w") as f:
+    def write_cards(self, cards: list[Card], path: str | Path = "questions.csv"):
+        logger.debug(f"Writing cards to {path}")
+        with open(path, "w", newline="") as f:
             writer = csv.writer(f, delimiter=",")
-            writer.writerow(["deck", "question", "suggested tags"])
+            writer.writerow(["deck", "question", "answer", "tags"])
             for card in cards:
-                writer.writerow([card.deck, card.question, card.suggested_tags])
-
-
-def main():
-    with AnkiManager(fetch_cards=False) as manager:
-        # TODO: standardize deck configs
-        # 1. Set all review max limits to 9999
-        # 2. Set all Review sort order to "Due date, and then random."
-
-        custom_deck_names = {
-            "high_ret_low_ivl": "🔺 High Retention Low Interval (0.96,30)",
-            "high_ret": "🔺 High Retention (0.96)",
-        }
-
-        def create_retention_and_interval_decks():
-            clone = manager.deck_manager.get_config(1)
-            high_ret_clone = copy.deepcopy(clone)
-            high_ret_clone["desiredRetention"] = 0.96
-            id_high_ret = manager.create_deck_config(
-                custom_deck_names["high_ret"], high_ret_clone
-            )
-
-            high_ret_low_ivl_clone = copy.deepcopy(clone)
-            high_ret_low_ivl_clone["desiredRetention"] = 0.96
-            high_ret_low_ivl_clone["rev"]["maxIvl"] = 30
-            id_high_ret_low_ivl = manager.create_deck_config(
-                custom_deck_names["high_ret_low_ivl"], high_ret_low_ivl_clone
-            )
-            leaf_decks = manager.get_leaf_decks()
-
-            for deck in leaf_decks:
-                if "SRE" not in deck[0]:
-                    continue
-
-                if any((cname in deck[0] for cname in custom_deck_names.values())):
-                    continue
-
-                for ret_deck_title in custom_deck_names.values():
-                    if "Low Interval" in ret_deck_title:
-                        dcid = id_high_ret_low_ivl
-                    else:
-                        dcid = id_high_ret
-                    # set_collapsed
-                    manager.create_deck(
-                        name=deck[0] + f"::{ret_deck_title}",
-                        deck_config_id=DeckConfigId(dcid),
-                    )
-                    manager.deck_manager.set_collapsed(deck[1], True, None)
-
-        def remove_retention_and_interval_decks(deck_names: list[str]):
-            to_remove = [
-                d[1]
-                for d in manager.get_decks()
-                if any([cname in d[0] for cname in deck_names])
-            ]
-            logger.warning(f"Removing decks: {to_remove}")
-            manager.remove_decks(to_remove)
-
-        def remove_retention_and_interval_configs(config_names: list[str]):
-            for cname in config_names:
-                logger.warning(f"Removing deck config: {cname}")
-                manager.remove_deck_config(cname)
+                writer.writerow(
+                    [card.deck, card.question, card.answer, " ".join(card.tags)]
+                )
+
+
+def update_retention_decks(manager: AnkiManager, reset: bool = False) -> None:
+    # TODO: standardize deck configs
+    # 1. Set all review max limits to 9999
+    # 2. Set all Review sort order to "Due date, and then random."
+
+    custom_deck_names = {
+        "high_ret_low_ivl": "🔺 High Retention Low Interval (0.96,30)",
+        "high_ret": "🔺 High Retention (0.96)",
+    }
+
+    def create_retention_and_interval_decks():
+        # Decks are limited with AnkiManager(decknames=...); subdecks created by
+        # an earlier run are leaves too and are skipped.
+        leaf_decks = [
+            deck
+            for deck in manager.get_leaf_decks()
+            if not any(cname in deck[0] for cname in custom_deck_names.values())
+        ]
+        if not leaf_decks:
+            logger.warning("No leaf decks to add retention subdecks to.")
+            return
+
+        clone = manager.deck_manager.get_config(1)
+        high_ret_clone = copy.deepcopy(clone)
+        high_ret_clone["desiredRetention"] = 0.96
+        id_high_ret = manager.create_deck_config(
+            custom_deck_names["high_ret"], high_ret_clone
+        )
 
-        reset = False
+        high_ret_low_ivl_clone = copy.deepcopy(clone)
+        high_ret_low_ivl_clone["desiredRetention"] = 0.96
+        high_ret_low_ivl_clone["rev"]["maxIvl"] = 30
+        id_high_ret_low_ivl = manager.create_deck_config(
+            custom_deck_names["high_ret_low_ivl"], high_ret_low_ivl_clone
+        )
 
-        if reset:
-            remove_retention_and_interval_decks(custom_deck_names.values())
-            remove_retention_and_interval_configs(custom_deck_names.values())
-        else:
-            create_retention_and_interval_decks()
+        for deck in leaf_decks:
+            for ret_deck_title in custom_deck_names.values():
+                if "Low Interval" in ret_deck_title:
+                    dcid = id_high_ret_low_ivl
+                else:
+                    dcid = id_high_ret
+                manager.create_deck(
+                    name=deck[0] + f"::{ret_deck_title}",
+                    deck_config_id=dcid,
+                )
+            manager.deck_manager.set_collapsed(deck[1], True, None)
+        logger.info(f"Added retention subdecks to {len(leaf_decks)} decks.")
+
+    def remove_retention_and_interval_decks(deck_names: list[str]):
+        to_remove = [
+            d[1]
+            for d in manager.get_decks()
+            if any([cname in d[0] for cname in deck_names])
+        ]
+        logger.warning(f"Removing decks: {to_remove}")
+        manager.remove_decks(to_remove)
+
+    def remove_retention_and_interval_configs(config_names: list[str]):
+        for cname in config_names:
+            logger.warning(f"Removing deck config: {cname}")
+            manager.remove_deck_config(cname)
+
+    if reset:
+        remove_retention_and_interval_decks(custom_deck_names.values())
+        remove_retention_and_interval_configs(custom_deck_names.values())
+    else:
+        create_retention_and_interval_decks()
 
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
-    load_dotenv()
-    main()
+    from ankeep import main
+
+    main(["decks", *sys.argv[1:]])
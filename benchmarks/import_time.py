@@ -0,0 +1,145 @@
+"""Track the startup cost of the ``ankeep`` CLI.
+
+Checks that importing the CLI and the modules it dispatches to does not pull
+in any of the heavy dependencies, and that ``ankeep --help``,
+``ankeep decks --help`` and the work ``decks``/``stats`` do before opening the
+collection stay within a time budget. The heavy dependencies must be
+installed, otherwise the import check would pass trivially. Exits non-zero on
+a regression, so it can be run in CI:
+
+    python benchmarks/import_time.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ["anki", "bs4", "lxml", "openai", "tqdm", "dotenv"]
+
+# Modules that are imported at startup, or by the light subcommands before
+# they open a collection.
+LIGHT_MODULES = ["ankeep", "anki_manager", "main", "prompt"]
+
+CHECK_IMPORTS = f"""
+import sys
+import ankeep
+ankeep.build_parser()
+for name in {LIGHT_MODULES!r}:
+    __import__(name)
+print(" ".join(
+    name for name in {HEAVY_MODULES!r}
+    if name in sys.modules or any(m.startswith(name + ".") for m in sys.modules)
+))
+"""
+
+# What `ankeep decks` and `ankeep stats` do before opening the collection.
+DECKS_STARTUP = """
+import ankeep
+import anki_manager
+from dotenv import load_dotenv
+ankeep.parse_args(["decks"])
+load_dotenv()
+"""
+
+# (label, interpreter arguments, whether the heavy dependencies are needed)
+COMMANDS = [
+    ("ankeep --help", ["ankeep.py", "--help"], False),
+    ("ankeep decks --help", ["ankeep.py", "decks", "--help"], False),
+    ("decks startup", ["-c", DECKS_STARTUP], True),
+]
+
+
+def run(args: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def missing_modules() -> list[str]:
+    return [name for name in HEAVY_MODULES if importlib.util.find_spec(name) is None]
+
+
+def heavy_imports() -> list[str]:
+    return run(["-c", CHECK_IMPORTS]).stdout.split()
+
+
+def time_command(args: list[str], repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def slowest_imports(n: int) -> list[tuple[int, str]]:
+    """Return the ``n`` slowest imports of ``ankeep`` in microseconds."""
+    stderr = run(["-X", "importtime", "-c", "import ankeep"]).stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        entries.append((int(cumulative), name.strip()))
+    return sorted(entries, reverse=True)[:n]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=0.5,
+        help="Maximum median seconds per command (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=10,
+        help="Number of runs per command (default: %(default)s).",
+    )
+    args = parser.parse_args()
+
+    failed = False
+
+    missing = missing_modules()
+    heavy = [] if missing else heavy_imports()
+    if missing:
+        print(f"FAIL: heavy modules not installed: {', '.join(missing)}")
+        failed = True
+    elif heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    else:
+        print("ok: no heavy modules imported at startup")
+
+    for label, command, needs_deps in COMMANDS:
+        if missing and needs_deps:
+            print(f"skip: {label} (dependencies missing)")
+            continue
+        timings = time_command(command, args.repeat)
+        median = statistics.median(timings)
+        status = "FAIL" if median > args.budget else "ok"
+        print(
+            f"{status}: {label} median {median * 1000:.1f}ms, "
+            f"min {min(timings) * 1000:.1f}ms (budget {args.budget * 1000:.0f}ms)"
+        )
+        failed = failed or median > args.budget
+
+    print("slowest imports of ankeep (cumulative):")
+    for cumulative, name in slowest_imports(5):
+        print(f"  {cumulative / 1000:>8.1f}ms  {name}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,8 @@
-import openai
 import time
 import re
-import os
+import sys
 from enum import Enum
 from anki_manager import AnkiManager
-from dotenv import load_dotenv
-from tqdm import tqdm
 import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from prompt import (
@@ -35,6 +32,8 @@ class ChatGPT:
         self.model = model or Model.GPT4_TURBO
 
     def get_completion(self, prompt):
+        import openai
+
         messages = [{"role": "user", "content": prompt}]
         try:
             response = openai.chat.completions.create(
@@ -184,13 +183,26 @@ def process(dname, cards, manager: AnkiManager):
 
 
 class App:
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        profile_dir: str | None = None,
+        decknames: list[str] | None = None,
+    ):
+        self.profile_dir = profile_dir
+        self.decknames = decknames
 
     def start(self):
+        from tqdm import tqdm
+
         logger.info("Starting Thread Pool..")
 
-        with AnkiManager() as manager:
+        with AnkiManager(self.profile_dir, decknames=self.decknames) as manager:
+            # Render on this thread so the workers below only read cached
+            # text; see the note on Card about cached_property and threads.
+            for cards in manager.cards.values():
+                for card in cards:
+                    card.render()
+
             args = (
                 (dname, cards, manager)
                 for dname, cards in manager.cards.items()
@@ -214,18 +226,15 @@ class App:
                         manager.flush_cards(cards)
 
 
-def main() -> None:
+def main(profile_dir: str | None = None, decknames: list[str] | None = None) -> None:
     try:
-        app = App()
+        app = App(profile_dir, decknames)
         app.start()
     except Exception:
         logger.error("Unhandled exception.", exc_info=True)
 
 
 if __name__ == "__main__":
-    load_dotenv()
-    openai.api_key = os.getenv("OPENAI_API_KEY")
-    format = "%(asctime)s: %(message)s"
-    logging.basicConfig(format=format, datefmt="%H:%M:%S")
-    logger.setLevel(level=logging.INFO)
-    main()
+    from ankeep import main as cli
+
+    cli(["tag", *sys.argv[1:]])
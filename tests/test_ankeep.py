@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+import pytest
+
+import ankeep
+import main
+
+
+def card(question="What is TCP?", answer="A transport protocol.", deck="Networking"):
+    return SimpleNamespace(question=question, answer=answer, deck=deck)
+
+
+def test_models_match_model_enum():
+    assert set(ankeep.MODELS) == {model.value for model in main.Model}
+
+
+def parse_args(argv):
+    return ankeep.parse_args(argv)[1]
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["-p", "/profile", "-d", "Maths", "-d", "SRE", "-v", "stats"],
+        ["stats", "-p", "/profile", "-d", "Maths", "-d", "SRE", "-v"],
+        ["-p", "/profile", "stats", "-d", "Maths", "-d", "SRE", "-v"],
+        ["-d", "Maths", "stats", "-p", "/profile", "-d", "SRE", "-v"],
+        ["-v", "-d", "Maths", "stats", "-d", "SRE", "-p", "/profile"],
+    ],
+)
+def test_common_options_before_or_after_command(argv):
+    args = parse_args(argv)
+    assert args.command == "stats"
+    assert args.func is ankeep.cmd_stats
+    assert args.profile == "/profile"
+    assert args.decknames == ["Maths", "SRE"]
+    assert args.verbose and not args.quiet
+    assert not any(name.startswith("sub_") for name in vars(args))
+
+
+def test_common_options_default():
+    args = parse_args(["decks"])
+    assert args.profile is None
+    assert args.decknames is None
+    assert not args.quiet and not args.verbose
+    assert not args.reset
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["-q", "stats", "-v"],
+        ["-v", "stats", "-q"],
+        ["stats", "-q", "-v"],
+        ["-p", "a", "stats", "-p", "b"],
+    ],
+)
+def test_conflicting_common_options(argv):
+    with pytest.raises(SystemExit):
+        parse_args(argv)
+
+
+@pytest.mark.parametrize(
+    "command, func",
+    [
+        ("tag", ankeep.cmd_tag),
+        ("lint", ankeep.cmd_lint),
+        ("dedupe", ankeep.cmd_dedupe),
+        ("decks", ankeep.cmd_decks),
+        ("export", ankeep.cmd_export),
+        ("stats", ankeep.cmd_stats),
+    ],
+)
+def test_dispatch(command, func):
+    assert parse_args([command]).func is func
+
+
+def test_command_options():
+    assert parse_args(["tag", "-m", "gpt-4"]).model == "gpt-4"
+    assert parse_args(["lint", "--max-answer-words", "5"]).max_answer_words == 5
+    assert parse_args(["decks", "--reset"]).reset
+    assert parse_args(["export", "-o", "out.csv"]).output == "out.csv"
+
+
+@pytest.mark.parametrize("argv", [[], ["-d", "Maths"], ["tag", "-m", "gpt-2"]])
+def test_invalid_arguments(argv):
+    with pytest.raises(SystemExit):
+        parse_args(argv)
+
+
+def test_lint_card():
+    assert ankeep.lint_card(card(), max_answer_words=40) == []
+    assert ankeep.lint_card(card(question=""), max_answer_words=40) == [
+        "empty question"
+    ]
+    assert ankeep.lint_card(card(answer="one two three"), max_answer_words=2) == [
+        "answer has 3 words"
+    ]
+
+
+def test_question_key():
+    assert ankeep.question_key("  What is\nTCP? ") == ankeep.question_key(
+        "what is tcp?"
+    )
+
+
+def test_find_duplicates():
+    first = card("What is TCP?", deck="Networking")
+    second = card("what is  TCP?", deck="SRE")
+    unique = card("What is UDP?")
+    empty = [card(""), card("")]
+    assert ankeep.find_duplicates([first, unique, second, *empty]) == [
+        [first, second]
+    ]
@@ -0,0 +1,160 @@
+import csv
+from types import SimpleNamespace
+
+import pytest
+
+import anki_manager
+from anki_manager import AnkiManager, Card
+
+DECKS = [
+    SimpleNamespace(name="Maths", id=1),
+    SimpleNamespace(name="Maths::Number Theory", id=2),
+    SimpleNamespace(name="Mathsy", id=3),
+    SimpleNamespace(name="SRE", id=4),
+]
+
+
+class StubCard:
+    def __init__(self, question="What is TCP?", answer="A protocol.", tags=()):
+        self.calls = {"question": 0, "answer": 0, "note": 0}
+        self._question = question
+        self._answer = answer
+        self._note = SimpleNamespace(tags=list(tags), fields=[question, answer])
+
+    def question(self):
+        self.calls["question"] += 1
+        return self._question
+
+    def answer(self):
+        self.calls["answer"] += 1
+        return self._answer
+
+    def note(self):
+        self.calls["note"] += 1
+        return self._note
+
+
+@pytest.fixture(autouse=True)
+def plain_clean_html(monkeypatch):
+    # The stub cards return plain text, so BeautifulSoup isn't needed.
+    monkeypatch.setattr(anki_manager, "clean_html", lambda html: html.strip())
+
+
+def test_card_renders_on_first_access():
+    src_card = StubCard()
+    card = Card(src_card, "Networking", 1)
+    assert src_card.calls == {"question": 0, "answer": 0, "note": 0}
+
+    assert card.question == "What is TCP?"
+    assert card.question == "What is TCP?"
+    assert card.answer == "A protocol."
+    assert card.fields == ["What is TCP?", "A protocol."]
+    assert src_card.calls == {"question": 1, "answer": 1, "note": 1}
+
+
+def test_card_render_fills_cache():
+    src_card = StubCard(tags=["Networking"])
+    card = Card(src_card, "Networking", 1)
+    card.render()
+    assert src_card.calls == {"question": 1, "answer": 1, "note": 1}
+    assert {"question", "answer", "tags"} <= vars(card).keys()
+
+    assert card.question == "What is TCP?"
+    assert card.answer == "A protocol."
+    assert card.tags == ["Networking"]
+    assert src_card.calls == {"question": 1, "answer": 1, "note": 1}
+
+
+def test_card_tags_write_back_to_note():
+    src_card = StubCard(tags=["Networking", "LINT_TAGS=1"])
+    card = Card(src_card, "Networking", 1)
+    assert card.has_lint_tag()
+
+    card.add_tags(["TCP", "Networking"])
+    card.remove_lint_tag()
+    note = card.get_note_with_tags()
+    assert note is src_card._note
+    assert note.tags == ["Networking", "TCP"]
+    assert not card.has_lint_tag()
+
+
+@pytest.fixture
+def stub_collection(monkeypatch):
+    collection = SimpleNamespace(close=lambda: None)
+    monkeypatch.setattr(anki_manager, "get_collection", lambda path: collection)
+    monkeypatch.setattr(anki_manager, "get_deck_manager", lambda col: None)
+    monkeypatch.setattr(anki_manager, "get_deck_names_and_ids", lambda col: DECKS)
+    return collection
+
+
+@pytest.mark.parametrize(
+    "decknames, expected",
+    [
+        (None, [1, 2, 3, 4]),
+        (["Maths"], [1, 2]),
+        (["Maths::Number Theory", "SRE"], [2, 4]),
+        (["Missing"], []),
+    ],
+)
+def test_decknames_filter(stub_collection, decknames, expected):
+    manager = AnkiManager("/profile", fetch_cards=False, decknames=decknames)
+    assert [did for _, did in manager.get_decks()] == expected
+
+
+def test_write_cards(stub_collection, tmp_path):
+    manager = AnkiManager("/profile", fetch_cards=False)
+    cards = [
+        SimpleNamespace(
+            deck="Maths", question="1 + 1?", answer="2", tags=["Maths", "Easy"]
+        )
+    ]
+    path = tmp_path / "cards.csv"
+    manager.write_cards(cards, path)
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [
+        ["deck", "question", "answer", "tags"],
+        ["Maths", "1 + 1?", "2", "Maths Easy"],
+    ]
+
+
+class FakeRetentionManager:
+    def __init__(self, leaf_decks):
+        self.leaf_decks = leaf_decks
+        self.configs = []
+        self.created = []
+        self.deck_manager = SimpleNamespace(
+            get_config=lambda dcid: {"rev": {"maxIvl": 36500}},
+            set_collapsed=lambda did, collapsed, browser_collapsed: None,
+        )
+
+    def get_leaf_decks(self):
+        return self.leaf_decks
+
+    def create_deck_config(self, name, clone):
+        self.configs.append(name)
+        return len(self.configs)
+
+    def create_deck(self, name, deck_config_id):
+        self.created.append((name, deck_config_id))
+
+
+def test_update_retention_decks():
+    manager = FakeRetentionManager(
+        [("Maths", 1), ("SRE::Linux", 2), ("Maths::🔺 High Retention (0.96)", 3)]
+    )
+    anki_manager.update_retention_decks(manager)
+    assert len(manager.configs) == 2
+    assert [name for name, _ in manager.created] == [
+        "Maths::🔺 High Retention Low Interval (0.96,30)",
+        "Maths::🔺 High Retention (0.96)",
+        "SRE::Linux::🔺 High Retention Low Interval (0.96,30)",
+        "SRE::Linux::🔺 High Retention (0.96)",
+    ]
+
+
+def test_update_retention_decks_without_leaf_decks():
+    manager = FakeRetentionManager([("Maths::🔺 High Retention (0.96)", 3)])
+    anki_manager.update_retention_decks(manager)
+    assert manager.configs == []
+    assert manager.created == []